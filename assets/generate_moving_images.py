@@ -9,57 +9,207 @@
 import sys
 import os
 import argparse
+import math
+import multiprocessing.util
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 from PIL import Image
 from scipy import ndimage
 
-def generate_frames(input_path, output_folder, num_frames=120):
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
+try:
+    import cupy as cp
+    from cupyx.scipy import ndimage as cp_ndimage
+except ImportError:
+    cp = None
 
-    try:
-        img = Image.open(input_path).convert('L') # Convert to grayscale as requested "black and white"
-    except Exception as e:
-        print(f"Error opening image: {e}")
-        return
+try:
+    import numba
+except ImportError:
+    numba = None
 
-    img_arr = np.array(img)
-    h, w = img_arr.shape
 
-    # Coordinate grid
-    y, x = np.mgrid[0:h, 0:w]
-    
-    # Center of rotation
-    cy, cx = h / 2.0, w / 2.0
+if numba is not None:
+    @numba.njit(cache=True)
+    def _mirror_index(i, n):
+        # Mirror boundary used by SciPy for spline taps that fall outside the input
+        if n == 1:
+            return 0
+        period = 2 * n - 2
+        i = abs(i) % period
+        return period - i if i >= n else i
 
-    print(f"Generating {num_frames} frames...")
+    @numba.njit(cache=True)
+    def _bspline3_weights(t):
+        # Cubic B-spline weights of the taps at floor(c) - 1 ... floor(c) + 2, with t = c - floor(c)
+        t2 = t * t
+        t3 = t2 * t
+        return (
+            (1.0 - t) ** 3 / 6.0,
+            (3.0 * t3 - 6.0 * t2 + 4.0) / 6.0,
+            (-3.0 * t3 + 3.0 * t2 + 3.0 * t + 1.0) / 6.0,
+            t3 / 6.0,
+        )
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _warp_bspline3(coeffs, src_y, src_x, out, cval):
+        """Numba equivalent of `ndimage.map_coordinates(..., order=3, mode='constant')`.
+
+        `coeffs` must be the output of `ndimage.spline_filter(img, order=3, mode='constant')`.
+        Writes the (n, h, w) batch of frames into the uint8 array `out`.
+        """
+        n, h, w = out.shape
+        ih, iw = coeffs.shape
+        # Parallelize over all output rows of the batch
+        for k in numba.prange(n * h):
+            f = k // h
+            i = k - f * h
+            for j in range(w):
+                y = src_y[f, i, j]
+                x = src_x[f, i, j]
+                if not (0.0 <= y <= ih - 1 and 0.0 <= x <= iw - 1):
+                    value = cval
+                else:
+                    y0 = int(math.floor(y))
+                    x0 = int(math.floor(x))
+                    wy = _bspline3_weights(y - y0)
+                    wx = _bspline3_weights(x - x0)
+                    value = 0.0
+                    for a in range(4):
+                        r = _mirror_index(y0 - 1 + a, ih)
+                        row = 0.0
+                        for b in range(4):
+                            row += wx[b] * coeffs[r, _mirror_index(x0 - 1 + b, iw)]
+                        value += wy[a] * row
+                # Round and clip to uint8 like SciPy does
+                if value <= 0.0:
+                    out[f, i, j] = 0
+                elif value >= 255.0:
+                    out[f, i, j] = 255
+                else:
+                    out[f, i, j] = np.uint8(value + 0.5)
+
+
+# Output formats: one PNG per frame, a single (num_frames, h, w) uint8 .npy volume,
+# or a lossless FFV1 video encoded by ffmpeg.
+OUTPUT_FORMATS = ("png", "npy", "ffv1")
+NPY_FILENAME = "frames.npy"
+FFV1_FILENAME = "frames.mkv"
+
+
+class _FrameRenderer:
+    """Warps batches of frames out of a single source image and writes them out."""
+
+    def __init__(
+        self, img_arr, output_folder, batch_size, use_gpu=False, use_numba=False, output_format="png", order=3
+    ):
+        # Array module and ndimage implementation for the selected device.
+        # Everything below is written against `xp`/`xndimage` so the same code
+        # runs on NumPy/SciPy (CPU) or CuPy/cupyx (GPU).
+        self.use_gpu = use_gpu
+        self.use_numba = use_numba
+        self.order = order
+        self.xp = xp = cp if use_gpu else np
+        self.xndimage = cp_ndimage if use_gpu else ndimage
+
+        self.output_folder = output_folder
+        self.output_format = output_format
+
+        h, w = img_arr.shape
+
+        # All warp arithmetic is done in float32: the coordinate fields are large and
+        # memory-bound, and float32 is plenty of precision to resample a uint8 image.
+        # Compared to float64 coordinates, which the committed frames were generated with,
+        # a few hundred pixels out of the 120 frames come out one grey level apart.
+        self.dtype = dtype = xp.float32
+
+        # The source image never changes, so for spline orders >= 2 its B-spline coefficients
+        # are computed once here (matching what map_coordinates' prefilter does for
+        # mode='constant') and every batch samples them with prefilter=False.
+        # Orders 0 and 1 interpolate the image directly.
+        # Either way they stay resident on the device for the whole run.
+        self.coeffs = xp.asarray(img_arr)
+        if order >= 2:
+            self.coeffs = self.xndimage.spline_filter(self.coeffs, order=order, mode='constant')
+
+        # Sampling coordinate and output frame buffers, allocated once and reused across batches.
+        self.src_coords = xp.empty((2, batch_size, h, w), dtype=dtype)
+        self.tmp_buf = xp.empty((batch_size, h, w), dtype=dtype)
+        self.frames_buf = xp.empty((batch_size, h, w), dtype=xp.uint8)
+
+        if output_format == "png":
+            # PNG encoding runs on background threads (zlib releases the GIL), so saving one
+            # batch overlaps with warping the next. At most one batch of saves is pending.
+            self.save_pool = ThreadPoolExecutor(max_workers=4)
+            self.pending_saves = []
+        elif output_format == "npy":
+            # Frames are copied straight into the memory-mapped volume created by generate_frames
+            self.frames_out = np.load(os.path.join(output_folder, NPY_FILENAME), mmap_mode='r+')
+        elif output_format == "ffv1":
+            # Raw grayscale frames are piped to ffmpeg in order, so this renderer must
+            # render every frame, in order.
+            self.ffmpeg = subprocess.Popen(
+                [
+                    "ffmpeg", "-y", "-loglevel", "error",
+                    "-f", "rawvideo", "-pix_fmt", "gray", "-s", f"{w}x{h}", "-r", "30", "-i", "-",
+                    "-c:v", "ffv1", os.path.join(output_folder, FFV1_FILENAME),
+                ],
+                stdin=subprocess.PIPE,
+            )
+
+        # The scalars below are `dtype` too, so no intermediate is promoted to float64.
+
+        # Center of rotation
+        self.cy, self.cx = dtype(h / 2.0), dtype(w / 2.0)
+
+        # Coordinate grid centered on the rotation center.
+        # This does not depend on the frame, so it is built once for all frames.
+        self.coords_y, self.coords_x = xp.mgrid[0:h, 0:w].astype(dtype)
+        self.coords_y -= self.cy
+        self.coords_x -= self.cx
+
+        # Ripple frequency (constant across frames)
+        self.freq = dtype(0.05)
+
+    def render(self, start, stop):
+        """Render and save frames `start` (inclusive) to `stop` (exclusive)."""
+        xp = self.xp
+        cy, cx = self.cy, self.cx
+        coords_y, coords_x = self.coords_y, self.coords_x
+        freq = self.freq
+
+        n = stop - start
+
+        # src_y/src_x are views into `src_coords` so it can be handed to map_coordinates as-is
+        batch_coords = self.src_coords[:, :n]
+        src_y, src_x = batch_coords
+        tmp = self.tmp_buf[:n]
+
+        # Frame indices of this batch, shaped (n, 1, 1) to broadcast against the (h, w) grid
+        t = xp.arange(start, stop, dtype=self.dtype).reshape(n, 1, 1)
 
-    for t in range(num_frames):
         # Time normalized 0 to 1 (or slightly more to show movement)
         # Transformations are small between frames.
-        
+
         # 1. Translation: Move towards right.
         # Target pixel (x, y) comes from Source (x - tv, y)
         trans_offset_x = 0.5 * t  # Move 0.5 pixel per frame right
-        
+
         # 2. Rotation: Rotate CCW.
         # To find value at target, we rotate coordinates CW.
         angle_deg = 0.5 * t # 0.5 degree per frame
-        angle_rad = np.deg2rad(angle_deg)
-        
+        angle_rad = xp.deg2rad(angle_deg)
+
         # 3. Deformation: Non-linear.
         # Let's add a sine wave ripple that moves.
         # deform(x, y) -> adds offset to sampling coordinates
-        freq = 0.05
         phase = 0.2 * t
-        deform_amp = 2.0 * np.sin(t * 0.05)
-        
-        # We need to construct the source coordinates for each target pixel (y, x)
-        
-        # Start with identity coordinates
-        coords_y = y - cy
-        coords_x = x - cx
-        
+        deform_amp = 2.0 * xp.sin(t * 0.05)
+
+        # We need to construct the source coordinates for each target pixel (y, x),
+        # starting from the centered identity coordinates (coords_y, coords_x).
+
         # Apply Inverse Rotation (CW)
         # x_rot = x * cos(theta) + y * sin(theta)
         # y_rot = -x * sin(theta) + y * cos(theta)
@@ -69,24 +219,41 @@ def generate_frames(input_path, output_folder, num_frames=120):
         # P_source = R_inv * P_target
         # R_inv for CCW(theta) is Rotation(-theta) = Rotation_CW(theta)
         # x_src = x_tgt * cos(-theta) - y_tgt * sin(-theta) = x_tgt * cos(theta) + y_tgt * sin(theta)
-        
-        cos_a = np.cos(angle_rad)
-        sin_a = np.sin(angle_rad)
-        
-        rot_x = coords_x * cos_a + coords_y * sin_a
-        rot_y = -coords_x * sin_a + coords_y * cos_a
-        
-        # Restore center
-        src_x = rot_x + cx
-        src_y = rot_y + cy
-        
-        # Apply Inverse Translation (Move right -> sample from left)
-        src_x = src_x - trans_offset_x
-        
+
+        cos_a = xp.cos(angle_rad)
+        sin_a = xp.sin(angle_rad)
+
+        # Restore center and apply Inverse Translation (Move right -> sample from left).
+        # Both are per-frame constants, so they are folded into a single (n, 1, 1) offset
+        # instead of taking separate passes over the coordinate fields.
+        offset_x = cx - trans_offset_x
+
+        # src_x = rot_x + cx - trans_offset_x, src_y = rot_y + cy
+        xp.multiply(coords_x, cos_a, out=src_x)
+        xp.multiply(coords_y, sin_a, out=tmp)
+        xp.add(src_x, tmp, out=src_x)
+        xp.add(src_x, offset_x, out=src_x)
+
+        xp.multiply(coords_y, cos_a, out=src_y)
+        xp.multiply(coords_x, sin_a, out=tmp)
+        xp.subtract(src_y, tmp, out=src_y)
+        xp.add(src_y, cy, out=src_y)
+
         # Apply Inverse Deformation (or just add distortion to source coords)
         # A simple ripple based on Y in the source domain
-        src_x = src_x + deform_amp * np.sin(src_y * freq + phase)
-        src_y = src_y + deform_amp * np.cos(src_x * freq + phase)
+        # src_x += deform_amp * sin(src_y * freq + phase)
+        xp.multiply(src_y, freq, out=tmp)
+        xp.add(tmp, phase, out=tmp)
+        xp.sin(tmp, out=tmp)
+        xp.multiply(tmp, deform_amp, out=tmp)
+        xp.add(src_x, tmp, out=src_x)
+
+        # src_y += deform_amp * cos(src_x * freq + phase)
+        xp.multiply(src_x, freq, out=tmp)
+        xp.add(tmp, phase, out=tmp)
+        xp.cos(tmp, out=tmp)
+        xp.multiply(tmp, deform_amp, out=tmp)
+        xp.add(src_y, tmp, out=src_y)
 
         # Map coordinates
         # map_coordinates expects (row_coords, col_coords) i.e. (y, x)
@@ -94,22 +261,211 @@ def generate_frames(input_path, output_folder, num_frames=120):
         # Given it's a "black and white image ... heatmap", constant 0 (black) or 255 (white) might be good.
         # Let's assume white background if the image is black on white.
         # Check image content? The name is "black-on-white". So background is white (255).
-        
-        new_img = ndimage.map_coordinates(img_arr, [src_y, src_x], order=3, mode='constant', cval=255.0)
-        
-        frame_filename = os.path.join(output_folder, f"frame_{t:03d}.png")
-        Image.fromarray(new_img.astype('uint8')).save(frame_filename)
-        
+
+        # With (2, n, h, w) coordinates the output is the (n, h, w) stack of frames.
+        new_imgs = self.frames_buf[:n]
+        if self.use_numba:
+            _warp_bspline3(self.coeffs, src_y, src_x, new_imgs, 255.0)
+        else:
+            self.xndimage.map_coordinates(
+                self.coeffs, batch_coords, output=new_imgs, order=self.order, mode='constant', cval=255.0, prefilter=False
+            )
+
+        # Only bring the finished frames back to the host for writing
+        if self.use_gpu:
+            new_imgs = new_imgs.get()
+
+        if self.output_format == "npy":
+            self.frames_out[start:stop] = new_imgs
+        elif self.output_format == "ffv1":
+            self.ffmpeg.stdin.write(new_imgs.tobytes())
+        else:
+            # Hand the saver threads their own copy of the frames, since the frame buffer is
+            # overwritten by the next batch (the GPU copy above is already their own).
+            if not self.use_gpu:
+                new_imgs = new_imgs.copy()
+
+            self.wait()
+            self.pending_saves = [
+                self.save_pool.submit(self._save_frame, t, new_img)
+                for t, new_img in enumerate(new_imgs, start)
+            ]
+
+    def wait(self):
+        """Block until all submitted frames are written, re-raising any save error."""
+        if self.output_format == "png":
+            for future in self.pending_saves:
+                future.result()
+            self.pending_saves = []
+        elif self.output_format == "npy":
+            self.frames_out.flush()
+
+    def close(self):
+        """Finish writing all frames and release the writer resources."""
+        self.wait()
+        if self.output_format == "png":
+            self.save_pool.shutdown(wait=True)
+        elif self.output_format == "ffv1":
+            self.ffmpeg.stdin.close()
+            if self.ffmpeg.wait() != 0:
+                raise RuntimeError(f"ffmpeg exited with code {self.ffmpeg.returncode}")
+
+    def _save_frame(self, t, new_img):
+        frame_filename = os.path.join(self.output_folder, f"frame_{t:03d}.png")
+        # Lowest zlib level: PNG stays lossless, and encoding is several times faster
+        Image.fromarray(new_img).save(frame_filename, compress_level=1)
+
         if t % 20 == 0:
             print(f"Saved {frame_filename}")
 
+
+# Per-process renderer used by the worker pool, set up once by `_init_worker`.
+_worker_renderer = None
+
+def _init_worker(img_arr, output_folder, batch_size, output_format, order):
+    global _worker_renderer
+    _worker_renderer = _FrameRenderer(img_arr, output_folder, batch_size, output_format=output_format, order=order)
+    # Workers are only told to exit once all batches are done, so close the renderer then
+    multiprocessing.util.Finalize(_worker_renderer, _worker_renderer.close, exitpriority=10)
+
+def _render_batch(bounds):
+    # Frames must be on disk before the task completes, as the worker may exit afterwards
+    _worker_renderer.render(*bounds)
+    _worker_renderer.wait()
+
+
+def generate_frames(
+    input_path,
+    output_folder,
+    num_frames=120,
+    use_gpu=False,
+    use_numba=False,
+    batch_size=8,
+    workers=None,
+    output_format="png",
+    order=3,
+):
+    if use_gpu and cp is None:
+        print("Error: --gpu requires cupy to be installed")
+        return
+
+    if use_numba and numba is None:
+        print("Error: --numba requires numba to be installed")
+        return
+
+    if not 0 <= order <= 5:
+        print(f"Error: spline order must be between 0 and 5, got {order}")
+        return
+
+    if use_numba and order != 3:
+        print("Error: --numba only supports --order 3")
+        return
+
+    if output_format not in OUTPUT_FORMATS:
+        print(f"Error: unknown output format {output_format!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+        return
+
+    if output_format == "ffv1" and shutil.which("ffmpeg") is None:
+        print("Error: --format ffv1 requires ffmpeg to be installed")
+        return
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    try:
+        img = Image.open(input_path).convert('L') # Convert to grayscale as requested "black and white"
+    except Exception as e:
+        print(f"Error opening image: {e}")
+        return
+
+    img_arr = np.array(img)
+    h, w = img_arr.shape
+
+    # The .npy volume is created up front so every renderer (possibly in another
+    # process) can write its frames into it.
+    if output_format == "npy":
+        np.lib.format.open_memmap(
+            os.path.join(output_folder, NPY_FILENAME), mode='w+', dtype=np.uint8, shape=(num_frames, h, w)
+        ).flush()
+
+    # Frames are warped in batches of `batch_size` with a single map_coordinates call each,
+    # which amortizes the per-call overhead over the whole batch.
+    # The batch size bounds the memory used by the (2, batch, h, w) coordinate fields.
+    batch_size = max(1, min(batch_size, num_frames))
+    batches = [(start, min(start + batch_size, num_frames)) for start in range(0, num_frames, batch_size)]
+
+    # Frames are independent of each other, so on the CPU the batches are spread over a
+    # pool of processes. The GPU path stays in this process, and so does the Numba path,
+    # which already runs on all cores, and FFV1 output, which must be written in order.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(batches)))
+
+    print(f"Generating {num_frames} frames...")
+
+    if use_gpu or use_numba or output_format == "ffv1" or workers == 1:
+        renderer = _FrameRenderer(
+            img_arr,
+            output_folder,
+            batch_size,
+            use_gpu=use_gpu,
+            use_numba=use_numba,
+            output_format=output_format,
+            order=order,
+        )
+        for start, stop in batches:
+            renderer.render(start, stop)
+        renderer.close()
+    else:
+        # The source image is sent to each worker once, not with every batch.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(img_arr, output_folder, batch_size, output_format, order),
+        ) as executor:
+            list(executor.map(_render_batch, batches))
+
+    if output_format == "npy":
+        print(f"Saved {os.path.join(output_folder, NPY_FILENAME)}")
+    elif output_format == "ffv1":
+        print(f"Saved {os.path.join(output_folder, FFV1_FILENAME)}")
+
     print("Done.")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate moving images from a single input image.")
     parser.add_argument("input_image", help="Path to source image")
     parser.add_argument("output_dir", help="Directory to save output frames")
-    
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument("--gpu", action="store_true", help="Warp frames on the GPU with CuPy (requires cupy)")
+    backend.add_argument("--numba", action="store_true", help="Warp frames with a multi-threaded Numba kernel (requires numba)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Number of frames warped per map_coordinates call")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes on the CPU (default: all cores)")
+    parser.add_argument(
+        "--order",
+        type=int,
+        default=3,
+        choices=range(6),
+        help="Spline interpolation order (default: 3, which matches the committed frames to within "
+        "±1 grey level). Use 1 (bilinear) for much faster frames, e.g. when they only feed the "
+        "pathfinding tests",
+    )
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="png",
+        help=f"Output format: one PNG per frame, a single {NPY_FILENAME} volume, or a lossless {FFV1_FILENAME} video (requires ffmpeg)",
+    )
+
     args = parser.parse_args()
-    
-    generate_frames(args.input_image, args.output_dir)
+
+    generate_frames(
+        args.input_image,
+        args.output_dir,
+        use_gpu=args.gpu,
+        use_numba=args.numba,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        output_format=args.format,
+        order=args.order,
+    )
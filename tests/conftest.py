@@ -0,0 +1,106 @@
+"""Shared fixtures for the pathfinding_py integration tests."""
+
+import os
+import pathlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from PIL import Image
+
+PROJECT_ROOT = pathlib.Path(__file__).parent.parent
+ASSETS_DIR = PROJECT_ROOT / "assets"
+
+
+def _decode_grayscale(path):
+    """Decode an image as a 2D uint8 array."""
+    # PIL's "L" mode is already uint8, so no extra copy is needed
+    return np.asarray(Image.open(path).convert("L"))
+
+
+def _is_up_to_date(path, sources):
+    """Whether `path` exists and is no older than any of `sources`."""
+    return path.exists() and path.stat().st_mtime >= max(source.stat().st_mtime for source in sources)
+
+
+def _cached_array(config, name, sources, load):
+    """Return the array built by `load`, cached as a .npy file in the pytest cache.
+
+    The cached array is memory-mapped read-only. It is rebuilt whenever one of
+    `sources` has been modified since it was written. Without the cacheprovider
+    plugin (`-p no:cacheprovider`) the array is built on every run instead.
+    """
+    if getattr(config, "cache", None) is None:
+        # Session fixtures are shared between tests, so keep this read-only like the memmap
+        array = load()
+        array.setflags(write=False)
+        return array
+
+    cache_path = config.cache.mkdir("pathfinding_py") / f"{name}.npy"
+
+    if not _is_up_to_date(cache_path, sources):
+        array = load()
+        # Write to a uniquely named temporary file first so neither an interrupted run
+        # nor a concurrent session (e.g. pytest-xdist workers) leaves a truncated cache
+        with tempfile.NamedTemporaryFile(dir=cache_path.parent, suffix=".tmp", delete=False) as f:
+            np.save(f, array)
+        os.replace(f.name, cache_path)
+
+    return np.load(cache_path, mmap_mode="r")
+
+
+@pytest.fixture(scope="session")
+def heatmap_array(pytestconfig):
+    """The heatmap image as a read-only (height, width) uint8 array."""
+    image_path = ASSETS_DIR / "black-on-white-lv-like-heatmap.png"
+
+    if not image_path.exists():
+        pytest.skip(f"Test image not found: {image_path}")
+
+    return _cached_array(pytestconfig, image_path.stem, [image_path], lambda: _decode_grayscale(image_path))
+
+
+@pytest.fixture(scope="session")
+def rotating_volume(pytestconfig):
+    """The rotating heatmap frames as a read-only (num_frames, height, width) uint8 volume."""
+    frames_dir = ASSETS_DIR / "black-on-white-lv-like-heatmap-rotating"
+
+    if not frames_dir.exists():
+        pytest.skip(f"Frames directory not found: {frames_dir}")
+
+    frame_files = sorted(frames_dir.glob("frame_*.png"))
+
+    if len(frame_files) == 0:
+        pytest.skip(f"No frame images found in {frames_dir}")
+
+    # The directory itself is a source too, so adding or removing frames invalidates the cache
+    sources = [frames_dir, *frame_files]
+
+    # Frames generated with `generate_moving_images.py --format npy` are already a
+    # (num_frames, height, width) volume, so they are memory-mapped as-is unless the
+    # PNG frames have been regenerated since
+    npy_path = frames_dir / "frames.npy"
+    if _is_up_to_date(npy_path, sources):
+        return np.load(npy_path, mmap_mode="r")
+
+    def load():
+        height, width = _decode_grayscale(frame_files[0]).shape
+        # Every frame is written below, and a failed decode fails the fixture, so the
+        # volume never needs to be zero-filled first
+        volume = np.empty((len(frame_files), height, width), dtype=np.uint8)
+
+        def decode_frame(t, frame_path):
+            frame_array = _decode_grayscale(frame_path)
+            assert frame_array.shape == (height, width), (
+                f"Frame {t} has wrong dimensions: {frame_array.shape} != ({height}, {width})"
+            )
+            volume[t] = frame_array
+
+        # PNG decoding releases the GIL, so frames are decoded in parallel
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(decode_frame, range(len(frame_files)), frame_files))
+
+        return volume
+
+    return _cached_array(pytestconfig, frames_dir.name, sources, load)
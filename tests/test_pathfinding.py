@@ -1,10 +1,7 @@
 """Integration tests for pathfinding_py module."""
 
-import pathlib
-
 import numpy as np
 import pytest
-from PIL import Image
 
 try:
     import pathfinding_py
@@ -15,17 +12,12 @@ except ImportError:
     )
 
 
-PROJECT_ROOT = pathlib.Path(__file__).parent.parent
-ASSETS_DIR = PROJECT_ROOT / "assets"
-
-
 def test_find_path_2d_astar():
     """Test 2D pathfinding with A* algorithm."""
 
     array = np.ones((10, 10), dtype=np.uint8) * 200
 
-    for i in range(10):
-        array[i, i] = 10
+    np.fill_diagonal(array, 10)
 
     start = (0, 0)
     end = (9, 9)
@@ -63,8 +55,7 @@ def test_find_path_2d_fringe():
     """Test 2D pathfinding with Fringe algorithm."""
     array = np.ones((8, 8), dtype=np.uint8) * 100
 
-    for i in range(8):
-        array[i, i] = 20
+    np.fill_diagonal(array, 20)
 
     start = (0, 0)
     end = (7, 7)
@@ -114,10 +105,8 @@ def test_find_route_temporal_astar():
     """Test temporal routing with A* algorithm."""
     volume = np.ones((10, 10, 5), dtype=np.uint8) * 150
 
-    for t in range(5):
-        x = min(t, 9)
-        y = min(t, 9)
-        volume[x, y, t] = 20
+    t = np.arange(5)
+    volume[np.minimum(t, 9), np.minimum(t, 9), t] = 20
 
     start = (0, 0, 0)
     end = (4, 4, 4)
@@ -136,10 +125,8 @@ def test_find_route_temporal_dijkstra():
     """Test temporal routing with Dijkstra algorithm."""
     volume = np.ones((5, 5, 3), dtype=np.uint8) * 100
 
-    for t in range(3):
-        x = min(t, 4)
-        y = min(t, 4)
-        volume[x, y, t] = 30
+    t = np.arange(3)
+    volume[np.minimum(t, 4), np.minimum(t, 4), t] = 30
 
     start = (0, 0, 0)
     end = (2, 2, 2)
@@ -157,10 +144,8 @@ def test_find_route_temporal_with_custom_starts_ends():
     """Test temporal routing with custom start and end positions."""
     volume = np.ones((6, 6, 4), dtype=np.uint8) * 80
 
-    for t in range(4):
-        x = 1 + t
-        y = 1 + t
-        volume[x, y, t] = 15
+    t = np.arange(4)
+    volume[1 + t, 1 + t, t] = 15
 
     start = (1, 1, 0)
     end = (4, 4, 3)
@@ -178,10 +163,8 @@ def test_find_route_temporal_with_reach():
     """Test temporal routing with custom reach parameter."""
     volume = np.ones((8, 8, 3), dtype=np.uint8) * 120
 
-    for t in range(3):
-        x = t * 2
-        y = t * 2
-        volume[x, y, t] = 25
+    t = np.arange(3)
+    volume[t * 2, t * 2, t] = 25
 
     start = (0, 0, 0)
     end = (4, 4, 2)
@@ -260,18 +243,16 @@ def test_find_route_temporal_invalid_both_out_of_bounds():
         pathfinding_py.find_route_temporal(volume, "astar", (10, 10, 10), (20, 20, 20))
 
 
-def test_2d_pathfinding_on_real_image():
+def test_2d_pathfinding_on_real_image(heatmap_array):
     """Test 2D pathfinding on the actual heatmap image (similar to justfile test command)."""
-    image_path = ASSETS_DIR / "black-on-white-lv-like-heatmap.png"
+    assert heatmap_array.ndim == 2, "Image should be 2D"
+    assert heatmap_array.dtype == np.uint8, "Array should be uint8"
 
-    if not image_path.exists():
-        pytest.skip(f"Test image not found: {image_path}")
+    height, width = heatmap_array.shape
 
-    img = Image.open(image_path).convert("L")
-    array = np.array(img, dtype=np.uint8)
-
-    assert array.ndim == 2, "Image should be 2D"
-    assert array.dtype == np.uint8, "Array should be uint8"
+    # find_path_2d indexes arrays as [x, y], i.e. shape (width, height), so the
+    # (height, width) image is passed as its zero-copy transpose
+    array = heatmap_array.T
 
     start = (269, 172)
     end = (470, 263)
@@ -285,37 +266,19 @@ def test_2d_pathfinding_on_real_image():
     assert path[-1] == end, "Path should end at the end position"
     assert cost > 0, "Cost should be positive"
 
-    height, width = array.shape
     for x, y in path:
         assert 0 <= x < width, f"Path point x={x} out of bounds [0, {width})"
         assert 0 <= y < height, f"Path point y={y} out of bounds [0, {height})"
 
 
-def test_temporal_pathfinding_on_rotating_frames():
+def test_temporal_pathfinding_on_rotating_frames(rotating_volume):
     """Test temporal pathfinding on rotating frame sequence (similar to justfile video command)."""
-    frames_dir = ASSETS_DIR / "black-on-white-lv-like-heatmap-rotating"
-
-    if not frames_dir.exists():
-        pytest.skip(f"Frames directory not found: {frames_dir}")
-
-    frame_files = sorted(frames_dir.glob("frame_*.png"))
-
-    if len(frame_files) == 0:
-        pytest.skip(f"No frame images found in {frames_dir}")
-
-    first_img = Image.open(frame_files[0]).convert("L")
-    width, height = first_img.size
-
-    num_frames = len(frame_files)
-    volume = np.zeros((width, height, num_frames), dtype=np.uint8)
+    num_frames, height, width = rotating_volume.shape
 
-    for t, frame_path in enumerate(frame_files):
-        img = Image.open(frame_path).convert("L")
-        frame_array = np.array(img, dtype=np.uint8)
-        assert frame_array.shape == (height, width), (
-            f"Frame {t} has wrong dimensions: {frame_array.shape} != ({width}, {height})"
-        )
-        volume[:, :, t] = frame_array
+    # find_route_temporal indexes volumes as [x, y, t], i.e. shape (width, height, time).
+    # Reversing the axes of the (time, height, width) frames gives exactly that as a
+    # zero-copy view, so each frame stays contiguous and x/y are not swapped.
+    volume = rotating_volume.T
 
     start_pos = (269, 172)
     end_pos = (413, 260)